@@ -1,28 +1,187 @@
 import ollama
-from langchain.memory import ConversationBufferWindowMemory
+from cachetools import TTLCache
+from langchain.memory import ConversationBufferWindowMemory, ConversationSummaryBufferMemory
 from langchain.schema import HumanMessage, AIMessage
 from app.knowledge_base import KnowledgeBase
+from app.llm_backend import get_backend
+import asyncio
+import atexit
+import collections
+import hashlib
+import io
 import json
 import logging
+import os
+import queue
+import re
+import textwrap
 import time
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures import ThreadPoolExecutor
 import threading
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared pool for blocking work with timeouts - reused across all calls so we
+# don't pay thread creation/teardown on every request
+_EXEC = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chat-io")
+atexit.register(_EXEC.shutdown, wait=False)
+
+# Keep models resident between turns; first request after an Ollama unload
+# otherwise pays a multi-second reload from disk
+_KEEP_ALIVE = '1h'
+_DEFAULT_MODEL = os.environ.get('OLLAMA_DEFAULT_MODEL', 'llama2:7b')
+
+
+class _LatencyStats:
+    """Rolling per-stage latency tracker reporting p50/p95/p99
+
+    Cheaper than formatting a log line per call and, unlike per-call INFO
+    logs, yields aggregated numbers that are actually usable for tuning.
+    """
+
+    def __init__(self, maxlen: int = 512):
+        self._samples = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentiles(self) -> dict:
+        with self._lock:
+            data = sorted(self._samples)
+        if not data:
+            return {'count': 0}
+
+        def pct(p):
+            return round(data[min(len(data) - 1, int(p * len(data)))], 4)
+
+        return {'count': len(data), 'p50': pct(0.50), 'p95': pct(0.95), 'p99': pct(0.99)}
+
+
+# Stage histograms for the request hot path
+_KB_LATENCY = _LatencyStats()
+_OLLAMA_LATENCY = _LatencyStats()
+_TOTAL_LATENCY = _LatencyStats()
+
+
+def _trunc(s: str, n: int) -> str:
+    """Truncate s to n characters, copying nothing when it already fits"""
+    return s if len(s) <= n else s[:n] + "…"
+
+
+# Tokenizer for real token-budget truncation; cl100k_base is a close enough
+# approximation for local models and much better than counting characters
+try:
+    import tiktoken
+    _ENC = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENC = None
+
+
+def _truncate_to_tokens(s: str, max_tokens: int) -> str:
+    """Truncate s to a token budget (~4 chars/token fallback without tiktoken)"""
+    if _ENC is None:
+        return _trunc(s, max_tokens * 4)
+    ids = _ENC.encode(s)
+    if len(ids) <= max_tokens:
+        return s
+    return _ENC.decode(ids[:max_tokens]) + "…"
+
 class ChatInterface:
+    # Precompiled word-boundary classifiers - one C-level scan per query
+    # instead of a Python substring test per keyword
+    _SIMPLE_RE = re.compile(r'\b(hello|hi|thanks|thank you)\b', re.IGNORECASE)
+    _FOLLOWUP_RE = re.compile(
+        r'\b(also|additionally|furthermore|moreover|what about|how about|'
+        r'and|but|continue|more|other|another)\b',
+        re.IGNORECASE
+    )
+
     def __init__(self):
         self.knowledge_base = None
         self.kb_load_attempted = False
         self._kb_lock = threading.Lock()
+
+        # Single sync and async clients so the underlying httpx connection
+        # pool (keep-alive sockets) persists across requests instead of
+        # paying connect/handshake per call
+        ollama_host = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')
+        self._client = ollama.Client(host=ollama_host)
+        self._aclient = ollama.AsyncClient(host=ollama_host)
+
+        # One persistent background loop runs all async work: the async
+        # client's pooled keep-alive sockets (and the per-model batchers)
+        # stay bound to a live loop, instead of each sync entry point
+        # spinning up a throwaway loop that leaves the pool attached to a
+        # dead one after the first request
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever,
+            daemon=True,
+            name="chat-loop"
+        ).start()
+
+        # Pluggable inference backend (LLM_BACKEND=ollama|llamacpp); the
+        # llama.cpp path talks to a llama-server serving a Q4_K_M quant
+        self._backend = get_backend(self._aclient)
+
+        # Exact-match LRU response cache keyed by (model, prompt) hash so
+        # verbatim repeat queries skip the multi-second Ollama call entirely
+        self._exact_cache = collections.OrderedDict()
+        self._exact_cache_max = 256
+
+        # Cached ollama.list() response - health checks can fire every few
+        # seconds and each list() is a network round-trip
+        self._models_cache = (0.0, None)
+
+        # Short-TTL cache for retrieved KB context - follow-ups and refined
+        # queries repeat heavily within a session
+        self._kb_cache = TTLCache(maxsize=512, ttl=600)
+
+        # Context retrieved for the previous turn, reused for follow-ups
+        self._last_context = ""
+
+        # Grammar-constrained JSON output (format='json') slows decoding
+        # considerably, so it is opt-in via the UI; the default path relies
+        # on a prompt-level instruction when structure is needed
+        self.enforce_json = False
+
+        # Micro-batching: requests that arrive within this window are sent to
+        # Ollama together so the engine can stack them into one forward pass
+        # (set OLLAMA_NUM_PARALLEL=8 server-side to allow concurrent slots)
+        self._batch_window = 0.008
+        self._batchers = {}  # model_name -> (loop, queue, worker task)
         
-        # Initialize memory with smaller window for faster loading
-        self.memory = ConversationBufferWindowMemory(
-            k=5,  # Reduced from 10 to 5 for faster access
-            return_messages=True
-        )
+        # Summary-buffer memory compresses older turns into a short summary
+        # while keeping recent ones verbatim, so multi-turn sessions stop
+        # replaying full message text into every prompt; a tiny local model
+        # keeps the summarization overhead negligible
+        self.memory = self._build_memory()
+
+        # Cached history list - load_memory_variables rebuilds the message
+        # list on every call, so cache it until the next memory write
+        self._history_cache = None
+
+        # One long-lived worker drains memory updates instead of spawning a
+        # fresh thread per response
+        self._mem_queue = queue.SimpleQueue()
+        threading.Thread(
+            target=self._memory_worker,
+            daemon=True,
+            name="chat-memory"
+        ).start()
+
+        # Warm the default model in the background so the first user request
+        # doesn't pay the cold model load
+        threading.Thread(
+            target=self.preload,
+            args=(_DEFAULT_MODEL,),
+            daemon=True,
+            name="chat-warmup"
+        ).start()
         
         self.system_prompt = """
         You are an expert system administrator and log analysis specialist. 
@@ -39,7 +198,45 @@ class ChatInterface:
         
         Always be concise but thorough in your explanations.
         """
-    
+
+        # Dedent once - the leading indentation on every line would otherwise
+        # be sent to the model on each call, inflating prefill tokens - and
+        # cache the message dict so it isn't rebuilt per request
+        self.system_prompt = textwrap.dedent(self.system_prompt).strip()
+        self._system_msg = {'role': 'system', 'content': self.system_prompt}
+
+        # Token estimate for num_keep so the system prompt survives context
+        # shifts across turns
+        if _ENC is not None:
+            self._system_prompt_tokens = len(_ENC.encode(self.system_prompt))
+        else:
+            self._system_prompt_tokens = len(self.system_prompt) // 4
+
+
+    def _build_memory(self):
+        """Build summarizing memory, falling back to the plain window buffer"""
+        try:
+            try:
+                from langchain_community.chat_models import ChatOllama
+            except ImportError:
+                from langchain.chat_models import ChatOllama
+
+            summarizer = ChatOllama(
+                model=os.environ.get('OLLAMA_SUMMARY_MODEL', 'qwen2.5:0.5b'),
+                temperature=0
+            )
+            return ConversationSummaryBufferMemory(
+                llm=summarizer,
+                max_token_limit=256,
+                return_messages=True
+            )
+        except Exception as e:
+            logger.warning(f"Summary memory unavailable, using window buffer: {str(e)}")
+            return ConversationBufferWindowMemory(
+                k=5,  # Reduced from 10 to 5 for faster access
+                return_messages=True
+            )
+
     def _lazy_load_kb(self):
         """Lazy load knowledge base only when needed"""
         if not self.kb_load_attempted:
@@ -55,7 +252,32 @@ class ChatInterface:
                     finally:
                         self.kb_load_attempted = True
     
+    def preload(self, model_name: str = _DEFAULT_MODEL):
+        """Load a model into memory and keep it resident
+
+        Safe to call from the UI at app boot; a tiny one-token generate forces
+        Ollama to load the model and keep_alive keeps it warm between turns.
+        """
+        try:
+            logger.info(f"Preloading model: {model_name}")
+            self._client.generate(
+                model=model_name,
+                prompt=' ',
+                options={'num_predict': 1},
+                keep_alive=_KEEP_ALIVE
+            )
+            logger.info(f"Model {model_name} preloaded")
+        except Exception as e:
+            logger.warning(f"Model preload failed for {model_name}: {str(e)}")
+
     def generate_response(self, user_input: str, model_name: str, uploaded_file=None) -> str:
+        """Synchronous wrapper around agenerate_response for legacy callers"""
+        return asyncio.run_coroutine_threadsafe(
+            self.agenerate_response(user_input, model_name, uploaded_file),
+            self._loop
+        ).result()
+
+    async def agenerate_response(self, user_input: str, model_name: str, uploaded_file=None) -> str:
         """Generate AI response using local LLM with optimizations"""
         try:
             start_time = time.time()
@@ -68,184 +290,391 @@ class ChatInterface:
                 context = ""
             else:
                 # Get context with timeout
-                context = self._get_context_with_timeout(user_input, timeout=2)
+                context = await self._retrieve_context(user_input)
                 prompt = self._build_optimized_prompt(user_input, context, uploaded_file)
-            
-            logger.info(f"Context retrieval took: {time.time() - start_time:.2f}s")
-            
+
+            _KB_LATENCY.observe(time.time() - start_time)
+            logger.debug(f"Context retrieval took: {time.time() - start_time:.2f}s")
+
+            # Check response cache before paying for a generate call
+            cache_key = self._response_cache_key(model_name, prompt)
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                logger.info("Returning cached LLM response")
+                return cached
+
             # Generate response with optimized settings
             ollama_start = time.time()
-            response = self._call_ollama_optimized(model_name, prompt)
-            logger.info(f"Ollama call took: {time.time() - ollama_start:.2f}s")
-            
+            response = await self._call_ollama_optimized(
+                model_name, prompt, large_context=uploaded_file is not None
+            )
+            _OLLAMA_LATENCY.observe(time.time() - ollama_start)
+            logger.debug(f"Ollama call took: {time.time() - ollama_start:.2f}s")
+
             if response.get('error'):
                 return f"Sorry, I encountered an error: {response['error']}. Please try again."
-            
+
             ai_response = response['message']['content']
-            
-            # Update memory asynchronously to avoid blocking
-            threading.Thread(
-                target=self._update_memory_async,
-                args=(user_input, ai_response),
-                daemon=True
-            ).start()
-            
-            logger.info(f"Total response time: {time.time() - start_time:.2f}s")
+            self._response_cache_put(cache_key, ai_response)
+
+            # Update memory on the background worker to avoid blocking
+            self._mem_queue.put((user_input, ai_response))
+
+            _TOTAL_LATENCY.observe(time.time() - start_time)
+            logger.debug(f"Total response time: {time.time() - start_time:.2f}s")
             return ai_response
             
         except Exception as e:
-            logger.error(f"Error in generate_response: {str(e)}")
+            logger.error(f"Error in agenerate_response: {str(e)}")
             return f"Sorry, I encountered an error: {str(e)}. Please try again."
     
+    async def astream_response(self, user_input: str, model_name: str,
+                               uploaded_file=None, cancel_event: asyncio.Event = None):
+        """Stream the AI response token-by-token as an async generator
+
+        Yields chunks as Ollama produces them so callers can render output
+        immediately instead of waiting for the full completion; pass a
+        cancel_event to abort mid-stream without paying for the unused tail.
+        """
+        try:
+            if self._is_simple_query(user_input):
+                prompt = self._build_simple_prompt(user_input, uploaded_file)
+            else:
+                context = await self._retrieve_context(user_input)
+                prompt = self._build_optimized_prompt(user_input, context, uploaded_file)
+
+            # Cached responses are replayed as a single chunk
+            cache_key = self._response_cache_key(model_name, prompt)
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                logger.info("Returning cached LLM response")
+                yield cached
+                return
+
+            chunks = []
+            stream = self._stream_ollama(
+                model_name, prompt, cancel_event,
+                large_context=uploaded_file is not None
+            )
+            async for token in stream:
+                chunks.append(token)
+                yield token
+
+            # Only record complete responses in cache and memory
+            if chunks and not (cancel_event and cancel_event.is_set()):
+                ai_response = "".join(chunks)
+                self._response_cache_put(cache_key, ai_response)
+                self._mem_queue.put((user_input, ai_response))
+
+        except Exception as e:
+            logger.error(f"Error in astream_response: {str(e)}")
+            yield f"Sorry, I encountered an error: {str(e)}. Please try again."
+
+    def stream_response(self, user_input: str, model_name: str, uploaded_file=None):
+        """Synchronous chunk generator over astream_response
+
+        Bridges the async stream for callers like st.write_stream that
+        consume a plain generator; chunks surface as soon as Ollama emits
+        them rather than after the full completion. Runs on the shared
+        background loop so the client's connection pool is reused.
+        """
+        agen = self.astream_response(user_input, model_name, uploaded_file)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(
+                        agen.__anext__(), self._loop
+                    ).result()
+                except StopAsyncIteration:
+                    break
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), self._loop).result()
+
+    async def _stream_ollama(self, model_name: str, prompt: str,
+                             cancel_event: asyncio.Event = None,
+                             large_context: bool = False):
+        """Yield response chunks from Ollama as they arrive"""
+        messages = [self._system_msg, {'role': 'user', 'content': prompt}]
+
+        logger.info(f"Streaming from Ollama with model: {model_name}")
+
+        stream = self._backend.chat_stream(
+            model=model_name,
+            messages=messages,
+            options=self._chat_options(large_context),
+            keep_alive=_KEEP_ALIVE,
+            fmt='json' if self.enforce_json else None
+        )
+        async for part in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                logger.info("Stream cancelled by caller")
+                break
+            content = part.get('message', {}).get('content', '')
+            if content:
+                yield content
+
+    def _response_cache_key(self, model_name: str, prompt: str) -> bytes:
+        """Hash (model, output mode, system prompt, user prompt) into a key"""
+        return hashlib.blake2b(
+            f"{model_name}|{int(self.enforce_json)}|{self.system_prompt}|{prompt}".encode(),
+            digest_size=16
+        ).digest()
+
+    def _response_cache_get(self, key: bytes):
+        """Return cached response and refresh its LRU position, or None"""
+        cached = self._exact_cache.get(key)
+        if cached is not None:
+            self._exact_cache.move_to_end(key)
+        return cached
+
+    def _response_cache_put(self, key: bytes, response: str):
+        """Insert response, evicting the least recently used entry if full"""
+        self._exact_cache[key] = response
+        self._exact_cache.move_to_end(key)
+        while len(self._exact_cache) > self._exact_cache_max:
+            self._exact_cache.popitem(last=False)
+
     def _is_simple_query(self, query: str) -> bool:
         """Determine if query is simple enough to skip KB search"""
-        simple_indicators = [
-            len(query.split()) <= 5,  # Very short queries
-            any(greeting in query.lower() for greeting in ['hello', 'hi', 'thanks', 'thank you']),
-            query.strip().endswith('?') and len(query) < 50  # Simple questions
-        ]
-        return any(simple_indicators)
+        return (
+            len(query.split()) <= 5  # Very short queries
+            or self._SIMPLE_RE.search(query) is not None
+            or (query.rstrip().endswith('?') and len(query) < 50)  # Simple questions
+        )
     
-    def _get_context_with_timeout(self, query: str, timeout: int = 2) -> str:
-        """Get context with strict timeout"""
+    async def _retrieve_context(self, user_input: str) -> str:
+        """Get KB context, reusing the previous turn's for follow-up queries
+
+        Follow-ups usually refer to the last exchange, so re-querying the KB
+        adds latency and can dilute the prompt with unrelated matches.
+        """
+        if self._seems_like_followup(user_input) and self._last_context:
+            logger.info("Reusing previous turn's context for follow-up")
+            return self._last_context
+
+        context = await self._get_context_with_timeout(user_input, timeout=2)
+        self._last_context = context
+        return context
+
+    async def _get_context_with_timeout(self, query: str, timeout: int = 2) -> str:
+        """Get context with strict timeout, without blocking the event loop"""
         try:
             # Lazy load KB
             self._lazy_load_kb()
             
             if not self.knowledge_base:
                 return ""
-            
+
+            # Normalized query key; repeats within the TTL skip the search
+            cache_key = " ".join(query.lower().split())[:256]
+            cached = self._kb_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Returning cached KB context")
+                return cached
+
             logger.info(f"Searching KB with {timeout}s timeout...")
-            
-            # Use ThreadPoolExecutor for hard timeout
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(
-                    self.knowledge_base.search_relevant_content,
-                    query,
-                    2  # Limit results for speed
-                )
-                try:
-                    result = future.result(timeout=timeout)
-                    return result[:800] if result else ""  # Limit context size
-                except FutureTimeoutError:
-                    logger.warning(f"KB search timed out after {timeout}s")
-                    return ""
-                    
+
+            # Submit to the shared pool and await the wrapped future - the
+            # hard timeout holds, but the loop stays free to serve other
+            # requests (and the batch window) while the search runs
+            future = _EXEC.submit(
+                self.knowledge_base.search_relevant_content,
+                query,
+                2  # Limit results for speed
+            )
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+                context = result[:800] if result else ""  # Limit context size
+                self._kb_cache[cache_key] = context
+                return context
+            except asyncio.TimeoutError:
+                logger.warning(f"KB search timed out after {timeout}s")
+                return ""
+
+
         except Exception as e:
             logger.error(f"Error getting context: {str(e)}")
             return ""
     
     def _build_simple_prompt(self, user_input: str, uploaded_file=None) -> str:
-        """Build minimal prompt for fast responses"""
-        parts = [f"User Query: {user_input}"]
-        
+        """Build minimal prompt for fast responses
+
+        Stable text leads and the volatile query comes last so consecutive
+        turns share the longest possible prefix with the server's KV cache.
+        """
+        parts = ["Please provide a helpful and concise response."]
+
         if uploaded_file:
             parts.append("Note: User has uploaded a log file for analysis.")
-        
-        parts.append("Please provide a helpful and concise response.")
-        return "\n\n".join(parts)
+
+        parts.append(f"User Query: {user_input}")
+        return _truncate_to_tokens("\n\n".join(parts), 512)
     
     def _build_optimized_prompt(self, user_input: str, context: str, uploaded_file=None) -> str:
         """Build optimized prompt with limited context"""
-        parts = [f"User Query: {user_input}"]
-        
+        # Write segments straight into one buffer - no per-part f-string
+        # copies and no final join over intermediate strings. Stable text
+        # leads and volatile pieces (context, history, query) come last so
+        # consecutive turns share the longest possible KV-cache prefix.
+        buf = io.StringIO()
+        buf.write("Please provide a helpful response based on the available context.")
+
+        if uploaded_file:
+            buf.write("\n\nNote: User has uploaded a log file for analysis.")
+
         if context and len(context.strip()) > 10:
             # Truncate context aggressively for speed
-            truncated_context = context[:500] + "..." if len(context) > 500 else context
-            parts.append(f"Relevant Context:\n{truncated_context}")
-        
-        if uploaded_file:
-            parts.append("Note: User has uploaded a log file for analysis.")
-        
+            buf.write("\n\nRelevant Context:\n")
+            buf.write(_trunc(context, 500))
+
         # Skip conversation history for speed unless it's a follow-up
         if self._seems_like_followup(user_input):
             try:
                 history = self._get_recent_history(max_exchanges=1)
                 if history:
-                    parts.append(f"Previous Context: {history}")
+                    buf.write("\n\nPrevious Context: ")
+                    buf.write(history)
             except Exception as e:
                 logger.warning(f"Error loading history: {str(e)}")
-        
-        parts.append("Please provide a helpful response based on the available context.")
-        
-        final_prompt = "\n\n".join(parts)
-        
-        # Hard limit on prompt size
-        if len(final_prompt) > 1200:
-            final_prompt = final_prompt[:1200] + "\n\n[Truncated for performance]"
-        
-        return final_prompt
+
+        buf.write("\n\nUser Query: ")
+        buf.write(user_input)
+
+        # Cap against the real token budget rather than a character guess
+        return _truncate_to_tokens(buf.getvalue(), 1024)
     
     def _seems_like_followup(self, query: str) -> bool:
         """Check if query seems like a follow-up question"""
-        followup_indicators = [
-            'also', 'additionally', 'furthermore', 'moreover',
-            'what about', 'how about', 'and', 'but',
-            'continue', 'more', 'other', 'another'
-        ]
-        query_lower = query.lower()
-        return any(indicator in query_lower for indicator in followup_indicators)
+        return self._FOLLOWUP_RE.search(query) is not None
     
+    def _history(self) -> list:
+        """Return the conversation history, reloading only after memory writes"""
+        if self._history_cache is None:
+            self._history_cache = self.memory.load_memory_variables({}).get('history', [])
+        return self._history_cache
+
     def _get_recent_history(self, max_exchanges: int = 1) -> str:
         """Get recent conversation history efficiently"""
         try:
-            history = self.memory.load_memory_variables({})
-            if not history or not history.get('history'):
+            history = self._history()
+            if not history:
                 return ""
-            
-            recent_messages = history['history'][-max_exchanges*2:]  # Get last N exchanges
+
+            recent_messages = history[-max_exchanges*2:]  # Get last N exchanges
             formatted = []
             
             for msg in recent_messages:
                 if isinstance(msg, HumanMessage):
-                    content = msg.content[:80] + "..." if len(msg.content) > 80 else msg.content
-                    formatted.append(f"User: {content}")
+                    formatted.append(f"User: {_trunc(msg.content, 80)}")
                 elif isinstance(msg, AIMessage):
-                    content = msg.content[:80] + "..." if len(msg.content) > 80 else msg.content
-                    formatted.append(f"Assistant: {content}")
+                    formatted.append(f"Assistant: {_trunc(msg.content, 80)}")
             
             return " | ".join(formatted)
         except Exception as e:
             logger.error(f"Error getting recent history: {str(e)}")
             return ""
     
-    def _call_ollama_optimized(self, model_name: str, prompt: str) -> dict:
-        """Call Ollama with optimized settings"""
+    def _chat_options(self, large_context: bool = False) -> dict:
+        """Optimized generation options shared by blocking and streaming calls
+
+        num_ctx is set explicitly: the prompt budget (~1024 tokens) plus
+        num_predict fits in 2048, and a smaller per-slot context lets Ollama
+        fit more parallel slots in the same memory. File-analysis prompts get
+        a larger window.
+        """
+        return {
+            'temperature': 0.1,  # Lower temperature for faster, more focused responses
+            'top_p': 0.9,
+            'num_predict': 512,  # Limit response length for speed
+            'num_ctx': 4096 if large_context else 2048,
+            'num_keep': self._system_prompt_tokens,  # Keep system prompt on context shift
+            'stop': ['\n\n\n', '---']  # Stop on excessive newlines
+        }
+
+    async def _call_ollama_optimized(self, model_name: str, prompt: str,
+                                     large_context: bool = False) -> dict:
+        """Call Ollama asynchronously with optimized settings"""
         try:
-            # Optimized options for faster response
-            options = {
-                'temperature': 0.1,  # Lower temperature for faster, more focused responses
-                'top_p': 0.9,
-                'num_predict': 512,  # Limit response length for speed
-                'stop': ['\n\n\n', '---']  # Stop on excessive newlines
-            }
-            
-            messages = [
-                {'role': 'system', 'content': self.system_prompt},
-                {'role': 'user', 'content': prompt}
-            ]
-            
+            options = self._chat_options(large_context)
+
+            messages = [self._system_msg, {'role': 'user', 'content': prompt}]
+
             logger.info(f"Calling Ollama with model: {model_name}")
-            
-            # Use ThreadPoolExecutor for timeout control
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(
-                    ollama.chat,
-                    model=model_name,
-                    messages=messages,
-                    options=options
+
+            try:
+                return await asyncio.wait_for(
+                    self._batched_chat(model_name, messages, options),
+                    timeout=25  # 25 second timeout
                 )
-                try:
-                    result = future.result(timeout=25)  # 25 second timeout
-                    return result
-                except FutureTimeoutError:
-                    logger.error("Ollama call timed out")
-                    return {"error": "Response timeout - please try a simpler query"}
-                    
+            except asyncio.TimeoutError:
+                logger.error("Ollama call timed out")
+                return {"error": "Response timeout - please try a simpler query"}
+
         except Exception as e:
             logger.error(f"Error calling Ollama: {str(e)}")
             return {"error": str(e)}
+
+    async def _batched_chat(self, model_name: str, messages: list, options: dict) -> dict:
+        """Queue a chat request on the per-model batcher and await its result"""
+        loop = asyncio.get_running_loop()
+
+        entry = self._batchers.get(model_name)
+        if entry is None or entry[0] is not loop or entry[0].is_closed():
+            # First request for this model on this loop - start its batcher
+            queue = asyncio.Queue()
+            worker = loop.create_task(self._batch_worker(model_name, queue))
+            self._batchers[model_name] = (loop, queue, worker)
+        else:
+            queue = entry[1]
+
+        future = loop.create_future()
+        await queue.put((messages, options, future))
+        return await future
+
+    async def _batch_worker(self, model_name: str, queue: asyncio.Queue):
+        """Collect requests arriving within the batch window and fire them together"""
+        while True:
+            batch = [await queue.get()]
+
+            # Brief coalescing window to pick up concurrent arrivals
+            await asyncio.sleep(self._batch_window)
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+
+            if len(batch) > 1:
+                logger.info(f"Batching {len(batch)} requests for model {model_name}")
+
+            # keep_alive holds the model resident so the whole batch (and the
+            # next one) shares a single load; Ollama stacks the concurrent
+            # calls into shared forward passes when parallel slots are enabled
+            results = await asyncio.gather(
+                *[
+                    self._backend.chat(
+                        model=model_name,
+                        messages=messages,
+                        options=options,
+                        keep_alive=_KEEP_ALIVE,
+                        fmt='json' if self.enforce_json else None
+                    )
+                    for messages, options, _ in batch
+                ],
+                return_exceptions=True
+            )
+
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
     
+    def _memory_worker(self):
+        """Drain queued (user_input, ai_response) pairs into memory"""
+        while True:
+            user_input, ai_response = self._mem_queue.get()
+            self._update_memory_async(user_input, ai_response)
+
     def _update_memory_async(self, user_input: str, ai_response: str):
         """Update memory asynchronously to avoid blocking main thread"""
         try:
@@ -253,15 +682,46 @@ class ChatInterface:
                 {"input": user_input},
                 {"output": ai_response}
             )
-            logger.info("Memory updated successfully")
         except Exception as e:
-            logger.error(f"Error updating memory: {str(e)}")
+            # Constructing ChatOllama never contacts the server, so a missing
+            # summary model only surfaces here, when pruning invokes it.
+            # Swap to the window buffer (keeping the transcript) and retry
+            # once instead of failing every turn from now on.
+            if not isinstance(self.memory, ConversationSummaryBufferMemory):
+                logger.error(f"Error updating memory: {str(e)}")
+                return
+            logger.warning(
+                f"Summarization failed ({str(e)}); switching to window buffer memory"
+            )
+            fallback = ConversationBufferWindowMemory(k=5, return_messages=True)
+            fallback.chat_memory = self.memory.chat_memory
+            self.memory = fallback
+            try:
+                self.memory.save_context(
+                    {"input": user_input},
+                    {"output": ai_response}
+                )
+            except Exception as retry_error:
+                logger.error(f"Error updating memory: {str(retry_error)}")
+                return
+
+        self._history_cache = None  # Invalidate cached history
+        logger.info("Memory updated successfully")
     
+    def _list_models(self, max_age: float = 30.0):
+        """Return ollama.list(), refreshing at most every max_age seconds"""
+        now = time.monotonic()
+        ts, val = self._models_cache
+        if val is None or now - ts > max_age:
+            val = self._client.list()
+            self._models_cache = (now, val)
+        return val
+
     def test_ollama_connection(self) -> tuple[bool, str]:
         """Test Ollama connection and return status"""
         try:
             logger.info("Testing Ollama connection...")
-            models_response = ollama.list()
+            models_response = self._list_models()
             if not isinstance(models_response, dict) or 'models' not in models_response:
                 return False, "Invalid response format from Ollama"
             
@@ -280,6 +740,7 @@ class ChatInterface:
         """Clear conversation memory"""
         try:
             self.memory.clear()
+            self._history_cache = None  # Invalidate cached history
             logger.info("Memory cleared successfully")
         except Exception as e:
             logger.error(f"Error clearing memory: {str(e)}")
@@ -287,7 +748,12 @@ class ChatInterface:
     def get_performance_stats(self) -> dict:
         """Get performance statistics"""
         return {
-            'kb_loaded': self.knowledge_base is not None,
-            'memory_size': len(self.memory.load_memory_variables({}).get('history', [])),
-            'kb_load_attempted': self.kb_load_attempted
+            'kb_loaded': self.knowledge_base is not None and self.knowledge_base.ping(),
+            'memory_size': len(self._history()),
+            'kb_load_attempted': self.kb_load_attempted,
+            'latency': {
+                'kb_seconds': _KB_LATENCY.percentiles(),
+                'ollama_seconds': _OLLAMA_LATENCY.percentiles(),
+                'total_seconds': _TOTAL_LATENCY.percentiles()
+            }
         }
\ No newline at end of file
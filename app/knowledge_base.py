@@ -1,21 +1,77 @@
 import os
 import json
-import pickle
+from functools import lru_cache
 from typing import List, Dict, Any
 from collections import defaultdict
 import re
 import logging
+import copy
+
+# orjson decodes 2-5x faster than stdlib json and shortens cold start;
+# fall back to the stdlib when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Default knowledge base, built once at import instead of from a literal on
+# every __init__ that falls through the load path
+_DEFAULT_KB = {
+    "quick_solutions": {
+        "disk_space": "Use 'df -h' to check disk usage and 'du -sh /*' to find large directories",
+        "memory_issue": "Check memory with 'free -h' and top memory processes with 'ps aux --sort=-%mem'",
+        "connection_refused": "Verify service status with 'systemctl status SERVICE' and check firewall",
+        "high_cpu": "Use 'top' or 'htop' to identify CPU-intensive processes",
+        "permission_denied": "Check permissions with 'ls -la' and fix with 'chmod' if needed"
+    },
+    "error_patterns": {
+        "out of memory": ["memory", "oom", "heap"],
+        "disk full": ["disk", "space", "full", "quota"],
+        "connection issues": ["connection", "refused", "timeout", "unreachable"],
+        "permission problems": ["permission", "denied", "forbidden", "access"]
+    },
+    "common_commands": [
+        "systemctl status SERVICE - check service status",
+        "df -h - check disk space",
+        "free -h - check memory usage",
+        "ps aux - list all processes",
+        "netstat -tulpn - check network connections"
+    ]
+}
+
 class KnowledgeBase:
     def __init__(self):
         self.knowledge_file = "data/knowledge_base.json"
-        self.cache_file = "data/search_cache.pkl"
         self.ensure_data_dir()
         self.knowledge_data = self.load_knowledge_base()
-        self.search_cache = self.load_search_cache()
-        
+
+        # In-memory LRU over the pure search function - O(1) get/set with
+        # eviction, and no pickle I/O on the query hot path
+        self._cached_search = lru_cache(maxsize=256)(self._search_uncached)
+
+        # Inverted keyword -> error-type index so query dispatch is one dict
+        # lookup per token instead of a substring scan over every keyword
+        self._kw_index = self._build_keyword_index()
+
+        # With pyahocorasick, one linear pass over the query finds every
+        # keyword (including inside compound words); the token index above
+        # remains the fallback
+        self._ac = self._build_keyword_automaton()
+
+        # Pre-tokenized quick solutions and commands: matching becomes one
+        # set intersection per entry instead of substring scans over the
+        # solution text for every query word
+        self._solution_index = {
+            key: frozenset(f"{key.replace('_', ' ')} {solution}".lower().split())
+            for key, solution in self.knowledge_data.get("quick_solutions", {}).items()
+        }
+        self._command_index = [
+            (command, frozenset(command.lower().split()))
+            for command in self.knowledge_data.get("common_commands", [])
+        ]
+
         # Pre-compile regex patterns for better performance
         self._compiled_patterns = {}
         self._precompile_patterns()
@@ -41,38 +97,51 @@ class KnowledgeBase:
             except Exception as e:
                 logger.warning(f"Failed to compile pattern {name}: {e}")
     
-    def load_search_cache(self) -> Dict[str, str]:
-        """Load search result cache"""
-        try:
-            if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'rb') as f:
-                    return pickle.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to load search cache: {e}")
-        return {}
-    
-    def save_search_cache(self):
-        """Save search result cache"""
+    def _build_keyword_index(self) -> Dict[str, List[str]]:
+        """Invert error_patterns into a keyword -> [error_type] map"""
+        index = defaultdict(list)
+        for error_type, keywords in self.knowledge_data.get("error_patterns", {}).items():
+            for keyword in keywords:
+                index[keyword.lower()].append(error_type)
+        return index
+
+    def _build_keyword_automaton(self):
+        """Build an Aho-Corasick automaton over all error-pattern keywords"""
         try:
-            # Limit cache size to prevent memory issues
-            if len(self.search_cache) > 100:
-                # Keep only the 50 most recent entries
-                items = list(self.search_cache.items())[-50:]
-                self.search_cache = dict(items)
-            
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(self.search_cache, f)
-        except Exception as e:
-            logger.warning(f"Failed to save search cache: {e}")
-        
+            import ahocorasick
+        except ImportError:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for keyword, error_types in self._kw_index.items():
+            automaton.add_word(keyword, error_types)
+        if not automaton:
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _match_error_types(self, query: str) -> set:
+        """Error types whose keywords appear in the query"""
+        if self._ac is not None:
+            hit_types = set()
+            for _, error_types in self._ac.iter(query):
+                hit_types.update(error_types)
+            return hit_types
+
+        hit_types = set()
+        for token in query.split():
+            hit_types.update(self._kw_index.get(token, ()))
+        return hit_types
+
     def load_knowledge_base(self) -> Dict[str, Any]:
         """Load knowledge base from file or create default"""
         try:
             if os.path.exists(self.knowledge_file):
-                with open(self.knowledge_file, 'r') as f:
-                    data = json.load(f)
-                    logger.info("Knowledge base loaded successfully")
-                    return data
+                with open(self.knowledge_file, 'rb') as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                logger.info("Knowledge base loaded successfully")
+                return data
         except Exception as e:
             logger.error(f"Error loading knowledge base: {e}")
         
@@ -82,41 +151,26 @@ class KnowledgeBase:
     
     def _create_default_kb(self) -> Dict[str, Any]:
         """Create default knowledge base with essential data"""
-        default_kb = {
-            "quick_solutions": {
-                "disk_space": "Use 'df -h' to check disk usage and 'du -sh /*' to find large directories",
-                "memory_issue": "Check memory with 'free -h' and top memory processes with 'ps aux --sort=-%mem'",
-                "connection_refused": "Verify service status with 'systemctl status SERVICE' and check firewall",
-                "high_cpu": "Use 'top' or 'htop' to identify CPU-intensive processes",
-                "permission_denied": "Check permissions with 'ls -la' and fix with 'chmod' if needed"
-            },
-            "error_patterns": {
-                "out of memory": ["memory", "oom", "heap"],
-                "disk full": ["disk", "space", "full", "quota"],
-                "connection issues": ["connection", "refused", "timeout", "unreachable"],
-                "permission problems": ["permission", "denied", "forbidden", "access"]
-            },
-            "common_commands": [
-                "systemctl status SERVICE - check service status",
-                "df -h - check disk space",
-                "free -h - check memory usage",
-                "ps aux - list all processes",
-                "netstat -tulpn - check network connections"
-            ]
-        }
-        
+        # Deep-copy the frozen module-level default so callers can mutate
+        # their KB without touching the template
+        default_kb = copy.deepcopy(_DEFAULT_KB)
+
         try:
             self.save_knowledge_base(default_kb)
         except Exception as e:
             logger.error(f"Failed to save default KB: {e}")
-        
+
         return default_kb
 
     def save_knowledge_base(self, data: Dict[str, Any]):
         """Save knowledge base to file"""
         try:
-            with open(self.knowledge_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            if orjson is not None:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(data, indent=2).encode('utf-8')
+            with open(self.knowledge_file, 'wb') as f:
+                f.write(payload)
         except Exception as e:
             logger.error(f"Error saving knowledge base: {e}")
 
@@ -124,63 +178,51 @@ class KnowledgeBase:
         """Fast search for relevant content with caching"""
         if not query or not query.strip():
             return ""
-        
+
         # Normalize query for caching
         query_key = query.lower().strip()
-        
-        # Check cache first
-        if query_key in self.search_cache:
-            logger.info("Returning cached search result")
-            return self.search_cache[query_key]
-        
+
         try:
-            logger.info(f"Performing fresh search for: {query_key[:30]}...")
-            
-            # Fast keyword-based search
-            results = self._fast_keyword_search(query_key, n_results)
-            
-            # Cache the result
-            self.search_cache[query_key] = results
-            
-            # Save cache asynchronously
-            try:
-                self.save_search_cache()
-            except Exception as e:
-                logger.warning(f"Failed to save cache: {e}")
-            
-            return results
-            
+            return self._cached_search(query_key, n_results)
         except Exception as e:
             logger.error(f"Search error: {e}")
             return self._get_fallback_response(query_key)
+
+    def _search_uncached(self, query_key: str, n_results: int) -> str:
+        """Run a fresh search - results are memoized by the LRU wrapper"""
+        logger.info(f"Performing fresh search for: {query_key[:30]}...")
+        return self._fast_keyword_search(query_key, n_results)
     
     def _fast_keyword_search(self, query: str, max_results: int) -> str:
         """Optimized keyword-based search"""
         query_words = set(query.lower().split())
         results = []
         
-        # Search quick solutions first (fastest)
+        # Search quick solutions first (fastest) - one set intersection per
+        # entry against the pre-tokenized index
         quick_solutions = self.knowledge_data.get("quick_solutions", {})
-        for key, solution in quick_solutions.items():
-            if any(word in key.lower() or word in solution.lower() for word in query_words):
-                results.append(f"**Quick Fix**: {solution}")
+        for key, tokens in self._solution_index.items():
+            if query_words & tokens:
+                results.append(f"**Quick Fix**: {quick_solutions[key]}")
                 if len(results) >= max_results:
                     break
         
-        # Search error patterns if we need more results
+        # Search error patterns if we need more results - one automaton pass
+        # (or index lookup per token) instead of scanning every keyword list
         if len(results) < max_results:
+            hit_types = self._match_error_types(query)
+
             error_patterns = self.knowledge_data.get("error_patterns", {})
             for error_type, keywords in error_patterns.items():
-                if any(keyword in query for keyword in keywords):
+                if error_type in hit_types:
                     results.append(f"**{error_type.title()}**: Check for {', '.join(keywords[:3])}")
                     if len(results) >= max_results:
                         break
         
         # Add common commands if still need results
         if len(results) < max_results:
-            common_commands = self.knowledge_data.get("common_commands", [])
-            for cmd in common_commands[:2]:  # Limit to 2 commands
-                if any(word in cmd.lower() for word in query_words):
+            for cmd, tokens in self._command_index[:2]:  # Limit to 2 commands
+                if query_words & tokens:
                     results.append(f"**Command**: {cmd}")
                     if len(results) >= max_results:
                         break
@@ -208,20 +250,25 @@ class KnowledgeBase:
                 
         return matches
     
+    def ping(self) -> bool:
+        """Cheap health probe - True once the knowledge data is loaded"""
+        return bool(self.knowledge_data)
+
     def clear_cache(self):
         """Clear search cache"""
         try:
-            self.search_cache.clear()
-            if os.path.exists(self.cache_file):
-                os.remove(self.cache_file)
+            self._cached_search.cache_clear()
             logger.info("Search cache cleared")
         except Exception as e:
             logger.error(f"Error clearing cache: {e}")
-    
+
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        cache_info = self._cached_search.cache_info()
         return {
-            'cache_size': len(self.search_cache),
+            'cache_size': cache_info.currsize,
+            'cache_hits': cache_info.hits,
+            'cache_misses': cache_info.misses,
             'knowledge_sections': list(self.knowledge_data.keys()),
             'compiled_patterns': len(self._compiled_patterns)
         }
\ No newline at end of file
@@ -0,0 +1,120 @@
+import logging
+import os
+
+import httpx
+import ollama
+
+logger = logging.getLogger(__name__)
+
+# Recommended quantization for locally served GGUF models: Q4_K_M roughly
+# halves bytes per weight vs fp16, cutting per-token latency ~40-50% on
+# CPU/Metal while keeping quality close to the full-precision model
+DEFAULT_QUANT_LEVEL = "Q4_K_M"
+
+
+class LLMBackend:
+    """Abstract chat backend so inference can target Ollama or llama.cpp"""
+
+    async def chat(self, model: str, messages: list, options: dict,
+                   keep_alive: str = None, fmt: str = None) -> dict:
+        """Run one chat completion; returns an Ollama-shaped response dict
+
+        fmt='json' requests grammar-constrained JSON output - noticeably
+        slower to decode, so callers should only set it on demand.
+        """
+        raise NotImplementedError
+
+    def chat_stream(self, model: str, messages: list, options: dict,
+                    keep_alive: str = None, fmt: str = None):
+        """Async iterator of Ollama-shaped response chunks"""
+        raise NotImplementedError
+
+
+class OllamaBackend(LLMBackend):
+    """Default backend - wraps a shared ollama.AsyncClient"""
+
+    def __init__(self, aclient: ollama.AsyncClient):
+        self._aclient = aclient
+
+    async def chat(self, model: str, messages: list, options: dict,
+                   keep_alive: str = None, fmt: str = None) -> dict:
+        return await self._aclient.chat(
+            model=model,
+            messages=messages,
+            options=options,
+            keep_alive=keep_alive,
+            format=fmt
+        )
+
+    async def chat_stream(self, model: str, messages: list, options: dict,
+                          keep_alive: str = None, fmt: str = None):
+        stream = await self._aclient.chat(
+            model=model,
+            messages=messages,
+            options=options,
+            keep_alive=keep_alive,
+            format=fmt,
+            stream=True
+        )
+        async for part in stream:
+            yield part
+
+
+class LlamaCppBackend(LLMBackend):
+    """Direct llama.cpp server backend via its OpenAI-compatible API
+
+    Point LLAMACPP_BASE_URL at a running `llama-server` (default port 8080).
+    Serving a Q4_K_M quant directly skips the Ollama layer entirely.
+    """
+
+    def __init__(self, base_url: str = None):
+        self._http = httpx.AsyncClient(
+            base_url=base_url or os.environ.get('LLAMACPP_BASE_URL', 'http://localhost:8080'),
+            timeout=30.0
+        )
+
+    async def chat(self, model: str, messages: list, options: dict,
+                   keep_alive: str = None, fmt: str = None) -> dict:
+        # keep_alive is an Ollama concept; llama-server keeps its one model
+        # resident for the process lifetime
+        options = options or {}
+        payload = {
+            'model': model,
+            'messages': messages,
+            'temperature': options.get('temperature'),
+            'top_p': options.get('top_p'),
+            'max_tokens': options.get('num_predict'),
+            'stop': options.get('stop')
+        }
+        if fmt == 'json':
+            payload['response_format'] = {'type': 'json_object'}
+        try:
+            response = await self._http.post('/v1/chat/completions', json=payload)
+            response.raise_for_status()
+            data = response.json()
+            content = data['choices'][0]['message']['content']
+            # Normalize to the Ollama response shape callers expect
+            return {'message': {'content': content}}
+        except Exception as e:
+            logger.error(f"llama.cpp backend error: {str(e)}")
+            return {"error": str(e)}
+
+    async def chat_stream(self, model: str, messages: list, options: dict,
+                          keep_alive: str = None, fmt: str = None):
+        # llama-server SSE streaming isn't wired up; deliver the completion
+        # as a single chunk so streaming callers still work on this backend
+        response = await self.chat(model, messages, options, keep_alive, fmt)
+        if response.get('error'):
+            raise RuntimeError(response['error'])
+        yield response
+
+
+def get_backend(aclient: ollama.AsyncClient) -> LLMBackend:
+    """Select the chat backend from the LLM_BACKEND environment variable"""
+    name = os.environ.get('LLM_BACKEND', 'ollama').lower()
+    if name in ('llamacpp', 'llama.cpp', 'llama-cpp'):
+        logger.info("Using llama.cpp chat backend")
+        return LlamaCppBackend()
+    if name != 'ollama':
+        logger.warning(f"Unknown LLM_BACKEND '{name}', falling back to ollama")
+    return OllamaBackend(aclient)
@@ -1,25 +1,111 @@
+import array
+import io
+import itertools
+import multiprocessing as mp
+import os
 import re
 import json
-import pandas as pd
+import numpy as np
 from datetime import datetime
 from typing import Dict, List, Any
 from collections import Counter
 
+# Below this many lines the Python loop wins; above it the pandas path
+# amortizes interpreter overhead across C-level scans
+_VECTORIZE_MIN_LINES = 10_000
+
+# Lines per streamed batch - keeps peak memory at O(batch) instead of
+# holding the whole decoded file plus its line list at once
+_BATCH_LINES = 50_000
+
+# Per-worker LogProcessor, created lazily in each pool process
+_WORKER_PROCESSOR = None
+
+
+def _scan_chunk(chunk_with_offset):
+    """Scan one (offset, lines) chunk in a worker process
+
+    The per-line scan has no cross-chunk dependencies, so chunks fan out
+    across cores and the partial results merge by addition/extension.
+    """
+    global _WORKER_PROCESSOR
+    if _WORKER_PROCESSOR is None:
+        _WORKER_PROCESSOR = LogProcessor()
+
+    offset, lines = chunk_with_offset
+    partial = {
+        'error_count': 0,
+        'warning_count': 0,
+        'critical_count': 0,
+        'patterns_found': {},
+        'category_ids': array.array('B')
+    }
+    if len(lines) >= _VECTORIZE_MIN_LINES:
+        _WORKER_PROCESSOR._scan_lines_vectorized(lines, partial, offset)
+    else:
+        _WORKER_PROCESSOR._scan_lines(lines, partial, offset)
+    return partial
+
 class LogProcessor:
     def __init__(self):
-        self.error_patterns = {
-            'error': r'(?i)(error|err|exception|fail|fatal)',
-            'warning': r'(?i)(warn|warning|caution)',
-            'critical': r'(?i)(critical|crit|emergency|alert)',
-            'timeout': r'(?i)(timeout|time.?out|expired)',
-            'connection': r'(?i)(connection|connect|disconnect|refused)',
-            'memory': r'(?i)(memory|mem|oom|out.?of.?memory)',
-            'disk': r'(?i)(disk|storage|space|full|quota)',
-            'network': r'(?i)(network|net|tcp|udp|http|https)',
-            'database': r'(?i)(database|db|sql|query|table)',
-            'authentication': r'(?i)(auth|login|password|credential|token)'
+        # Literal keywords per category - scanned in one pass per line
+        # instead of one regex invocation per category
+        self.keyword_categories = {
+            'error': ('error', 'err', 'exception', 'fail', 'fatal'),
+            'warning': ('warning', 'warn', 'caution'),
+            'critical': ('critical', 'crit', 'emergency', 'alert'),
+            'timeout': ('timeout', 'time out', 'time-out', 'expired'),
+            'connection': ('connection', 'connect', 'disconnect', 'refused'),
+            'memory': ('memory', 'mem', 'oom', 'out of memory', 'out-of-memory'),
+            'disk': ('disk', 'storage', 'space', 'full', 'quota'),
+            'network': ('network', 'net', 'tcp', 'udp', 'http', 'https'),
+            'database': ('database', 'db', 'sql', 'query', 'table'),
+            'authentication': ('auth', 'login', 'password', 'credential', 'token')
         }
-        
+
+        # Dense integer ids per category so aggregation can run over a packed
+        # byte array with np.bincount instead of dict counting
+        self._cat_names = tuple(self.keyword_categories)
+        self._cat_id = {name: i for i, name in enumerate(self._cat_names)}
+
+        # Alternation strings per category for the vectorized pandas path
+        self._category_regex_strings = {
+            category: '|'.join(map(re.escape, keywords))
+            for category, keywords in self.keyword_categories.items()
+        }
+
+        # Aho-Corasick automaton finds every keyword in one linear pass;
+        # without it the scalar scan uses plain substring tests - every
+        # keyword is a literal, and str.__contains__'s C two-way search
+        # beats dispatching into the regex engine per category
+        self._automaton = None
+        try:
+            import ahocorasick
+            automaton = ahocorasick.Automaton()
+            for category, keywords in self.keyword_categories.items():
+                for keyword in keywords:
+                    automaton.add_word(keyword, category)
+            automaton.make_automaton()
+            self._automaton = automaton
+        except ImportError:
+            pass
+
+        # Cheap prefilter: blank/numeric/framing lines ('----', '1234') can
+        # never match a keyword, so skip the scan for anything without a letter
+        self._has_alpha = re.compile(r'[a-zA-Z]')
+
+        # One merged timestamp alternation, compiled once and anchored at the
+        # line start (where log timestamps live), so a non-matching line fails
+        # immediately instead of being scanned to the end three times. The
+        # prefix class tolerates common framing ('[2024-...]', '# ', '< ')
+        # without giving up the anchor
+        self._timestamp_pattern = re.compile(
+            r'[\[\s<#]*'
+            r'((?:\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})'
+            r'|(?:\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2})'
+            r'|(?:\w{3} \d{2} \d{2}:\d{2}:\d{2}))'
+        )
+
         self.severity_levels = {
             'CRITICAL': 4,
             'ERROR': 3,
@@ -31,48 +117,61 @@ class LogProcessor:
     def process_file(self, uploaded_file) -> Dict[str, Any]:
         """Process uploaded log file and return analysis"""
         try:
-            # Read file content
-            content = uploaded_file.read().decode('utf-8')
-            lines = content.split('\n')
-            
+            # Stream the file in line batches instead of decoding it all
+            # into one huge string plus a list of every line
+            wrapper = io.TextIOWrapper(uploaded_file, encoding='utf-8', errors='replace')
+
             # Analyze log entries
             analysis = {
-                'total_lines': len(lines),
+                'total_lines': 0,
                 'error_count': 0,
                 'warning_count': 0,
                 'critical_count': 0,
                 'patterns_found': {},
+                'category_ids': array.array('B'),
                 'timeline': [],
                 'recommendations': [],
                 'summary': ""
             }
-            
-            # Process each line
-            for i, line in enumerate(lines):
-                if not line.strip():
-                    continue
-                    
-                # Extract timestamp
-                timestamp = self.extract_timestamp(line)
-                
-                # Check for patterns
-                for pattern_name, pattern in self.error_patterns.items():
-                    if re.search(pattern, line):
-                        if pattern_name not in analysis['patterns_found']:
-                            analysis['patterns_found'][pattern_name] = []
-                        analysis['patterns_found'][pattern_name].append({
-                            'line_number': i + 1,
-                            'content': line.strip(),
-                            'timestamp': timestamp
-                        })
-                
-                # Count severity levels
-                if re.search(self.error_patterns['error'], line):
-                    analysis['error_count'] += 1
-                elif re.search(self.error_patterns['warning'], line):
-                    analysis['warning_count'] += 1
-                elif re.search(self.error_patterns['critical'], line):
-                    analysis['critical_count'] += 1
+
+            offset = 0
+
+            def batches():
+                nonlocal offset
+                while True:
+                    batch = [line.rstrip('\n') for line in itertools.islice(wrapper, _BATCH_LINES)]
+                    if not batch:
+                        return
+                    start = offset
+                    offset += len(batch)
+                    yield start, batch
+
+            batch_iter = batches()
+            first = next(batch_iter, None)
+            second = next(batch_iter, None) if first is not None else None
+
+            if second is not None and len(second[1]) == _BATCH_LINES:
+                # At least two full batches (100k+ lines): fan the chunks out
+                # across cores and merge the partial results; line numbers
+                # already carry their global offset. Spawn (not fork): by the
+                # time an upload lands here the process holds Streamlit and
+                # chat worker threads, and forking a multi-threaded process
+                # can deadlock on locks held at fork time - workers only need
+                # this module and the picklable (offset, lines) chunks anyway
+                with mp.get_context('spawn').Pool(os.cpu_count()) as pool:
+                    chunks = itertools.chain([first, second], batch_iter)
+                    for partial in pool.imap(_scan_chunk, chunks):
+                        self._merge_partial(analysis, partial)
+            else:
+                # Small file: the fork/pickle overhead of a pool would cost
+                # more than the scan itself
+                for start, batch in filter(None, [first, second]):
+                    if len(batch) >= _VECTORIZE_MIN_LINES:
+                        self._scan_lines_vectorized(batch, analysis, start)
+                    else:
+                        self._scan_lines(batch, analysis, start)
+
+            analysis['total_lines'] = offset
             
             # Generate recommendations
             analysis['recommendations'] = self.generate_recommendations(analysis)
@@ -83,19 +182,127 @@ class LogProcessor:
         except Exception as e:
             return {'error': f"Failed to process file: {str(e)}"}
     
+    def _merge_partial(self, analysis: Dict[str, Any], partial: Dict[str, Any]):
+        """Fold one chunk's partial results into the file-level analysis"""
+        for key in ('error_count', 'warning_count', 'critical_count'):
+            analysis[key] += partial[key]
+        analysis['category_ids'].extend(partial['category_ids'])
+
+        for category, entry in partial['patterns_found'].items():
+            target = analysis['patterns_found'].get(category)
+            if target is None:
+                analysis['patterns_found'][category] = entry
+            else:
+                target['line_numbers'].extend(entry['line_numbers'])
+                target['contents'].extend(entry['contents'])
+                target['timestamps'].extend(entry['timestamps'])
+
+    def _scan_lines(self, lines: List[str], analysis: Dict[str, Any], offset: int = 0):
+        """Scan lines one at a time, accumulating matches into analysis"""
+        for i, line in enumerate(lines):
+            # Strip once per line - reused for the blank check and the
+            # stored content
+            stripped = line.strip()
+            if not stripped:
+                continue
+
+            # Skip lines with no alphabetic content before the keyword scan
+            if not self._has_alpha.search(stripped):
+                continue
+
+            # One scan yields every matched category
+            categories = self._scan_categories(stripped.lower())
+            if not categories:
+                continue
+
+            # Timestamps are only stored with matches, so only matching
+            # lines pay for the extraction
+            timestamp = self.extract_timestamp(stripped)
+            self._record_line(analysis, categories, offset + i, stripped, timestamp)
+
+    def _scan_lines_vectorized(self, lines: List[str], analysis: Dict[str, Any], offset: int = 0):
+        """Scan lines with pandas boolean masks - the regexes run in C loops
+
+        Counts come straight from the masks; Python-level per-line work is
+        only done for the (typically small) subset of matching lines.
+        """
+        # Imported here rather than at module level: pool workers and
+        # small-file runs never touch pandas, so they skip its ~0.5s import
+        import pandas as pd
+
+        # Lowercase the whole batch once; the per-category scans then run
+        # case-sensitively instead of case-folding on every comparison
+        s = pd.Series(lines).str.lower()
+        masks = {
+            category: s.str.contains(pattern, regex=True, na=False).values
+            for category, pattern in self._category_regex_strings.items()
+        }
+
+        # Severity counts with the same critical > error > warning priority
+        # the scalar path applies per line
+        critical = masks['critical']
+        error = masks['error'] & ~critical
+        warning = masks['warning'] & ~critical & ~error
+        analysis['critical_count'] += int(critical.sum())
+        analysis['error_count'] += int(error.sum())
+        analysis['warning_count'] += int(warning.sum())
+
+        # Materialize match details only for lines that hit something
+        any_match = np.logical_or.reduce(list(masks.values()))
+        for i in np.flatnonzero(any_match):
+            stripped = lines[i].strip()
+            timestamp = self.extract_timestamp(stripped)
+            categories = {category for category, mask in masks.items() if mask[i]}
+            self._record_line(analysis, categories, offset + int(i), stripped, timestamp,
+                              count_severity=False)
+
+    def _record_line(self, analysis: Dict[str, Any], categories: set,
+                     index: int, stripped: str, timestamp: str,
+                     count_severity: bool = True):
+        """Record one (already stripped) line's category hits and severity
+
+        Matches are stored as parallel arrays per category rather than one
+        dict per match - a packed int array plus two string lists cost a
+        fraction of millions of 3-key dicts on error-heavy logs.
+        """
+        for category in categories:
+            entry = analysis['patterns_found'].get(category)
+            if entry is None:
+                entry = analysis['patterns_found'][category] = {
+                    'line_numbers': array.array('i'),
+                    'contents': [],
+                    'timestamps': []
+                }
+            entry['line_numbers'].append(index + 1)
+            entry['contents'].append(stripped)
+            entry['timestamps'].append(timestamp)
+            analysis['category_ids'].append(self._cat_id[category])
+
+        if not count_severity:
+            return
+
+        # Count severity levels from the same hit set
+        if 'critical' in categories:
+            analysis['critical_count'] += 1
+        elif 'error' in categories:
+            analysis['error_count'] += 1
+        elif 'warning' in categories:
+            analysis['warning_count'] += 1
+
+    def _scan_categories(self, line_lower: str) -> set:
+        """Return the set of keyword categories present in a lowercased line"""
+        if self._automaton is not None:
+            return {category for _, category in self._automaton.iter(line_lower)}
+        return {
+            category
+            for category, keywords in self.keyword_categories.items()
+            if any(keyword in line_lower for keyword in keywords)
+        }
+
     def extract_timestamp(self, line: str) -> str:
         """Extract timestamp from log line"""
-        timestamp_patterns = [
-            r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}',
-            r'\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}',
-            r'\w{3} \d{2} \d{2}:\d{2}:\d{2}',
-        ]
-        
-        for pattern in timestamp_patterns:
-            match = re.search(pattern, line)
-            if match:
-                return match.group()
-        return ""
+        match = self._timestamp_pattern.match(line)
+        return match.group(1) if match else ""
     
     def generate_recommendations(self, analysis: Dict) -> List[str]:
         """Generate actionable recommendations based on analysis"""
@@ -126,9 +333,12 @@ class LogProcessor:
         summary += f"{analysis['warning_count']} warnings."
         
         if analysis['patterns_found']:
-            top_issues = sorted(analysis['patterns_found'].keys(), 
-                              key=lambda x: len(analysis['patterns_found'][x]), 
-                              reverse=True)[:3]
+            # One bincount over the packed id array, then a partial sort for
+            # the top three instead of sorting every category
+            counts = np.bincount(analysis['category_ids'], minlength=len(self._cat_names))
+            top = np.argpartition(counts, -3)[-3:]
+            top = top[np.argsort(counts[top])[::-1]]
+            top_issues = [self._cat_names[i] for i in top if counts[i]]
             summary += f" Main issue categories: {', '.join(top_issues)}."
         
         return summary
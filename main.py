@@ -1,9 +1,11 @@
 import streamlit as st
+import hashlib
+import heapq
 import os
 import psutil
 import platform
 import sys
-from datetime import datetime
+import time
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -22,11 +24,124 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+
+# Shared component singletons - st.cache_resource keeps one instance per
+# server process, so reruns (and sessions) reuse the warmed ChatInterface,
+# compiled LogProcessor patterns, and loaded knowledge base instead of
+# rebuilding them on every script run
+@st.cache_resource(show_spinner=False)
+def get_chat_interface() -> ChatInterface:
+    return ChatInterface()
+
+
+@st.cache_resource(show_spinner=False)
+def get_log_processor() -> LogProcessor:
+    return LogProcessor()
+
+
+@st.cache_resource(show_spinner=False)
+def get_knowledge_base() -> KnowledgeBase:
+    return KnowledgeBase()
+
+
+# Static host facts - platform.version() shells out on some systems and
+# none of these change while the app runs, so resolve them once at import
+_PLATFORM = platform.system()
+_PLATFORM_VERSION = platform.version()
+_CPU_COUNT = psutil.cpu_count(logical=False)
+# Boot time is fixed for the host's uptime; format it once with
+# time.strftime rather than constructing a datetime per report
+_BOOT_TIME = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(psutil.boot_time()))
+
+# Byte-size units as shifts; formatting uses :.2f directly instead of
+# round() plus float division by 1024 ** n
+_GIB = 1 << 30
+_MIB = 1 << 20
+
+
+@st.cache_data(show_spinner=False)
+def _static_system_info() -> list:
+    """Report lines for facts that never change while the server is up
+
+    The underlying platform/CPU facts are resolved once at import; this
+    cache (no ttl, unlike the dynamic section) just reuses the formatted
+    lines for the process lifetime. Deliberately not persisted to disk -
+    a persisted copy could serve another host's facts if the image moves.
+    """
+    return [
+        "### System Information",
+        f"- Platform: {_PLATFORM} {_PLATFORM_VERSION}",
+        f"- CPU Cores: {_CPU_COUNT}",
+    ]
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _dynamic_system_info() -> list:
+    """Report lines for live readings, cached for 5 seconds
+
+    Repeated clicks (and Streamlit reruns) within the window reuse the
+    last readings instead of re-walking every process each time.
+    """
+    # One snapshot per resource - virtual_memory() was previously called
+    # twice for the same report
+    vm = psutil.virtual_memory()
+    disk_usage = psutil.disk_usage("/")
+
+    # Collect system info
+    sys_info = {
+        "Total Memory (GB)": vm.total / _GIB,
+        "Available Memory (GB)": vm.available / _GIB,
+        "Disk Usage": {},
+        "Running Processes": len(psutil.pids()),
+        "Boot Time": _BOOT_TIME,
+    }
+
+    sys_info["Disk Usage"] = {
+        "Total (GB)": disk_usage.total / _GIB,
+        "Used (GB)": disk_usage.used / _GIB,
+        "Free (GB)": disk_usage.free / _GIB,
+        "Percent Used": disk_usage.percent,
+    }
+
+    # Top 5 processes - oneshot() batches each process's /proc reads into
+    # one pass instead of one syscall round-trip per attribute
+    procs = []
+    for proc in psutil.process_iter():
+        try:
+            with proc.oneshot():
+                procs.append((proc.pid, proc.name(), proc.memory_info().rss))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    # O(n) heap selection of the 5 biggest instead of sorting every process
+    processes = heapq.nlargest(5, procs, key=lambda p: p[2])
+
+    # Assemble the report as a list of lines and join once instead of
+    # rebuilding the string with ~20 incremental concatenations
+    parts = [
+        f"- Total Memory: {sys_info['Total Memory (GB)']:.2f} GB",
+        f"- Available Memory: {sys_info['Available Memory (GB)']:.2f} GB",
+        f"- Boot Time: {sys_info['Boot Time']}",
+        f"- Number of Processes: {sys_info['Running Processes']}",
+        "Disk Usage:",
+    ]
+    parts.extend(
+        f"  - {key}: {value:.2f} GB" if 'GB' in key else f"  - {key}: {value}"
+        for key, value in sys_info["Disk Usage"].items()
+    )
+    parts.append("Top 5 Processes by Memory Usage:")
+    parts.extend(
+        f"  - PID: {pid} | Name: {name} | RSS: {rss / _MIB:.2f} MB"
+        for pid, name, rss in processes
+    )
+
+    return parts
+
+
 class LogAnalyzerApp:
     def __init__(self):
-        self.chat_interface = ChatInterface()
-        self.log_processor = LogProcessor()
-        self.knowledge_base = KnowledgeBase()
+        self.chat_interface = get_chat_interface()
+        self.log_processor = get_log_processor()
+        self.knowledge_base = get_knowledge_base()
         
     def run(self):
         st.title("🔍 Axway AI Log Assistant")
@@ -46,6 +161,12 @@ class LogAnalyzerApp:
                 "Upload Log File",
                 type=['log', 'txt', 'json', 'xml']
             )
+
+            # Grammar-constrained JSON decoding is markedly slower, so it
+            # stays off unless explicitly requested
+            self.chat_interface.enforce_json = st.checkbox(
+                "Enforce JSON (slow)", value=False
+            )
             
             # System info
             st.header("System Analysis")
@@ -61,56 +182,22 @@ class LogAnalyzerApp:
         # Main chat interface
         self.render_chat_interface(uploaded_file, model_choice)
         
-    def show_system_analysis(self):
-      # Collect system info
-      sys_info = {
-          "Platform": platform.system(),
-          "Platform Version": platform.version(),
-          "CPU Cores": psutil.cpu_count(logical=False),
-          "Total Memory (GB)": round(psutil.virtual_memory().total / (1024 ** 3), 2),
-          "Available Memory (GB)": round(psutil.virtual_memory().available / (1024 ** 3), 2),
-          "Disk Usage": {},
-          "Running Processes": len(psutil.pids()),
-          "Boot Time": datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S"),
-      }
-  
-      # Disk usage
-      disk_usage = psutil.disk_usage("/")
-      sys_info["Disk Usage"] = {
-          "Total (GB)": round(disk_usage.total / (1024 ** 3), 2),
-          "Used (GB)": round(disk_usage.used / (1024 ** 3), 2),
-          "Free (GB)": round(disk_usage.free / (1024 ** 3), 2),
-          "Percent Used": disk_usage.percent,
-      }
-  
-      # Top 5 processes
-      processes = sorted(psutil.process_iter(['pid', 'name', 'memory_info']),
-                         key=lambda p: p.info['memory_info'].rss,
-                         reverse=True)[:5]
-  
-      # Build output string
-      output = ""
-      output += f"### System Information\n"
-      output += f"- Platform: {sys_info['Platform']} {sys_info['Platform Version']}\n"
-      output += f"- CPU Cores: {sys_info['CPU Cores']}\n"
-      output += f"- Total Memory: {sys_info['Total Memory (GB)']} GB\n"
-      output += f"- Available Memory: {sys_info['Available Memory (GB)']} GB\n"
-      output += f"- Boot Time: {sys_info['Boot Time']}\n"
-      output += f"- Number of Processes: {sys_info['Running Processes']}\n"
-      output += "Disk Usage:\n"
-      for key, value in sys_info["Disk Usage"].items():
-          if 'GB' in key:
-              output += f"  - {key}: {value} GB\n"
-          else:
-              output += f"  - {key}: {value}\n"
-      output += "Top 5 Processes by Memory Usage:\n"
-      for proc in processes:
-          output += f"  - PID: {proc.info['pid']} | Name: {proc.info['name']} | RSS: {round(proc.info['memory_info'].rss / (1024 ** 2), 2)} MB\n"
-  
-      return output
-
-
-    
+    def show_system_analysis(self, target=None):
+        """Build the system report, optionally rendering it as it goes
+
+        Pass target (st itself or any container) to write each section as
+        its own markdown block instead of one monolithic render; the joined
+        report string is always returned for the chat-history append.
+        """
+        sections = [
+            "\n".join(_static_system_info()),
+            "\n".join(_dynamic_system_info()),
+        ]
+        if target is not None:
+            for section in sections:
+                target.markdown(section)
+        return "\n".join(sections) + "\n"
+
     def render_chat_interface(self, uploaded_file, model_choice):
         # Chat history
         if "messages" not in st.session_state:
@@ -121,11 +208,19 @@ class LogAnalyzerApp:
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
         
-        # File processing
+        # File processing - key the upload by content hash so each file is
+        # analyzed once, not re-parsed on every Streamlit rerun
         if uploaded_file:
+            file_key = hashlib.md5(uploaded_file.getvalue()).hexdigest()
+            if st.session_state.get("processed_file_key") != file_key:
+                with st.chat_message("assistant"):
+                    st.markdown("📁 Processing uploaded log file...")
+                    analysis_results = self.log_processor.process_file(uploaded_file)
+                st.session_state["processed_file_key"] = file_key
+                st.session_state["analysis_results"] = analysis_results
+            else:
+                analysis_results = st.session_state["analysis_results"]
             with st.chat_message("assistant"):
-                st.markdown("📁 Processing uploaded log file...")
-                analysis_results = self.log_processor.process_file(uploaded_file)
                 st.markdown(f"**Analysis Completed:**")
                 st.markdown(f"**Summary:** {analysis_results['summary']}")
                 st.markdown(f"**Recommendations:** {analysis_results.get('recommendation', 'No recommendations available.')}")
@@ -138,14 +233,15 @@ class LogAnalyzerApp:
             with st.chat_message("user"):
                 st.markdown(prompt)
             
-            # Generate response
+            # Stream the response token-by-token; write_stream renders each
+            # chunk as it arrives and returns the concatenated text
             with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    response = self.chat_interface.generate_response(
+                response = st.write_stream(
+                    self.chat_interface.stream_response(
                         prompt, model_choice, uploaded_file
                     )
-                    st.markdown(response)
-            
+                )
+
             # Add assistant response
             st.session_state.messages.append({"role": "assistant", "content": response})
 